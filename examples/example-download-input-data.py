@@ -1,75 +1,231 @@
 from data_downloader import DataDownloader
 
 import os
+import sys
+import argparse
 import zipfile
+import shutil
 import csv
 import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
+from pathlib import Path
 
+# The downloads are independent and mostly network bound, so we run them in a
+# pool of worker threads. MAX_PER_HOST limits how many of those workers may talk
+# to the same server at once so that we don't hammer any single host (most of
+# the datasets below come from nextcloud.eatlas.org.au or files.ausseabed.gov.au).
+MAX_WORKERS = 8
+MAX_PER_HOST = 2
+
+# By convention we use `data/in` for input data that is new data associated with the datasets being created
+# and we use `data/in-3p` for input data that is used in the 3rd party datasets.
+IN_3P = Path("data/in-3p")
+IN = Path("data/in")
 
 # Create an instance of the DataDownloader class
-downloader = DataDownloader(download_path="data/in-3p")
+# Datasets that belong in `data/in` pass root=IN, rather than switching `downloader.download_path`
+# part way through the script, as the downloads run concurrently.
+downloader = DataDownloader(download_path=IN_3P)
+
+# Each job is (url, dataset_name, keyword arguments for download_and_unzip)
+# The large single-file downloads use num_parts=4 to fetch the zip as 4 parallel byte ranges.
+JOBS = []
+
+# One semaphore per host name, used to cap the number of concurrent requests to each server.
+host_limits = defaultdict(lambda: threading.Semaphore(MAX_PER_HOST))
+
+# Maximum request rate (requests per second) for each host. Hosts not listed use DEFAULT_RATE.
+# BOM serves the many small tide gauge files, so we keep requests to it slow.
+HOST_RATES = {
+    'www.bom.gov.au': 1,
+    'files.ausseabed.gov.au': 4,
+}
+DEFAULT_RATE = 2
+
+# --------------------------------------------------------
+# Spaces out the requests to a host so that they start at most `rps` times per second.
+# Only call wait() immediately before a request that actually goes to the network.
+class RateLimiter:
+    def __init__(self, rps):
+        self.min_interval = 1 / rps
+        self.last = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            delay = self.last + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.last = time.monotonic()
+
+rate_limits = {}
+def rate_limit_for(host):
+    if host not in rate_limits:
+        rate_limits[host] = RateLimiter(HOST_RATES.get(host, DEFAULT_RATE))
+    return rate_limits[host]
 
 # --------------------------------------------------------
 # Function to unzip a file to a specified directory
+# Each entry is streamed straight from the archive to its target file using a 1 MB
+# buffer, which keeps memory use flat for the large NetCDF files in EOT20.
+# Extracted files are given the modification time recorded in the zip, so that on
+# a rerun entries whose file already exists with the same size and time are skipped.
+# The entries are extracted by a pool of threads (zlib releases the GIL while
+# inflating). ZipFile objects can't be shared between threads, so each worker
+# opens its own handle on the archive.
+UNZIP_BUFFER_SIZE = 1024 * 1024
+
+# The extracted files aren't read again by this script, so where the OS supports it we
+# tell the kernel that the archive is read sequentially and that it can drop the pages
+# of each extracted file, rather than letting them fill the page cache.
+# posix_fadvise isn't available on Windows.
+HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# If zlib-ng is installed (`pip install zlib-ng`) zipfile is pointed at it instead of the
+# stdlib zlib. It is a drop-in replacement with a SIMD accelerated inflate, which speeds
+# up the large EOT20 and bathymetry extracts. As this patches the zipfile module it also
+# applies to the unzips done by DataDownloader. Without it the stdlib zlib is used.
+try:
+    from zlib_ng import zlib_ng
+    zipfile.zlib = zlib_ng
+except ImportError:
+    pass
+
 def unzip_file(zip_file_path, extract_to):
     print(f"Unzipping {zip_file_path} to {extract_to}...")
+    extract_root = os.path.abspath(extract_to)
     with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_to)
+        infos = zip_ref.infolist()
+
+    entries = []
+    for info in infos:
+        target = os.path.abspath(os.path.join(extract_root, info.filename))
+        # Don't allow entries such as '../file' to be written outside extract_to
+        if os.path.commonpath([extract_root, target]) != extract_root:
+            raise ValueError(f"Unsafe path {info.filename} in {zip_file_path}")
+        if info.is_dir():
+            os.makedirs(target, exist_ok=True)
+        else:
+            entries.append((info, target))
+
+    worker_state = threading.local()
+    handles = []
+
+    def extract_entry(entry):
+        info, target = entry
+        zip_ref = getattr(worker_state, 'zip_ref', None)
+        if zip_ref is None:
+            zip_ref = worker_state.zip_ref = zipfile.ZipFile(zip_file_path, 'r')
+            handles.append(zip_ref)
+            if HAS_FADVISE:
+                os.posix_fadvise(zip_ref.fp.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        entry_mtime = time.mktime(info.date_time + (0, 0, -1))
+        try:
+            st = os.stat(target)
+            if st.st_size == info.file_size and int(st.st_mtime) >= entry_mtime:
+                return
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        with zip_ref.open(info) as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst, length=UNZIP_BUFFER_SIZE)
+            if HAS_FADVISE:
+                dst.flush()
+                os.posix_fadvise(dst.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        os.utime(target, (entry_mtime, entry_mtime))
+
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            list(executor.map(extract_entry, entries))
+    finally:
+        for zip_ref in handles:
+            zip_ref.close()
     print(f"Unzipped {zip_file_path} successfully!")
-    
+
+# --------------------------------------------------------
+# WKT2 string for EPSG:4283, generated with pyproj the first time it is needed.
+# pyproj is slow to import (it loads the PROJ database), so it is only imported
+# here, and the result is kept for any other shapefiles that need it.
+_EPSG_4283_WKT2 = None
+
+def get_epsg_4283_wkt2():
+    global _EPSG_4283_WKT2
+    if _EPSG_4283_WKT2 is None:
+        from pyproj import CRS
+        _EPSG_4283_WKT2 = CRS.from_epsg(4283).to_wkt("WKT2_2019")
+    return _EPSG_4283_WKT2
+
 # --------------------------------------------------------
 # Function to replace the .prj file with WKT2 EPSG:4283
 def replace_prj_with_epsg_4283(shapefile_path):
     prj_file = os.path.splitext(shapefile_path)[0] + ".prj"
     print(f"Replacing .prj file at {prj_file} with EPSG:4283 WKT2...")
-    # Generate WKT2 string for EPSG:4283 using pyproj
-    # from pyproj import CRS
-    # wkt_content = CRS.from_epsg(4283).to_wkt("WKT2_2019")
+    # Uncomment to write the WKT2 string (requires pyproj)
     # with open(prj_file, "w") as f:
-    #     f.write(wkt_content)
+    #     f.write(get_epsg_4283_wkt2())
     print(".prj file successfully replaced! (placeholder)")
-    
-    
-print("Downloading source data files. This will take a while ...")
-    
+
+# --------------------------------------------------------
+# Run a download while holding the semaphore for its host, after waiting for its rate limit.
+# If `target` (the folder the download ends up in) already exists, the download will be
+# skipped without a request, so it is run straight away.
+def run_with_host_limit(host_limit, rate_limit, target, func, *args, **kwargs):
+    if target is not None and os.path.exists(target):
+        return func(*args, **kwargs)
+    with host_limit:
+        rate_limit.wait()
+        return func(*args, **kwargs)
+
+# --------------------------------------------------------
+# Order jobs round-robin across hosts so that workers waiting on a busy host
+# don't starve downloads from the other hosts.
+def interleave_by_host(jobs):
+    by_host = defaultdict(list)
+    for job in jobs:
+        by_host[urlparse(job[0]).netloc].append(job)
+    queues = list(by_host.values())
+    ordered = []
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
 # --------------------------------------------------------
 # Australian Coastline 50K 2024 (NESP MaC 3.17, AIMS)
 # https://eatlas.org.au/geonetwork/srv/eng/catalog.search#/metadata/c5438e91-20bf-4253-a006-9e9600981c5f
 # Hammerton, M., & Lawrey, E. (2024). Australian Coastline 50K 2024 (NESP MaC 3.17, AIMS) (2nd Ed.) [Data set]. eAtlas. https://doi.org/10.26274/qfy8-hj59
 # Here we download parts of the full datasets and place them into subfolders. We flatten because the original zip contains subfolder
-# `Split` which we don't need because we are putting it in the subfolder `Split`. Without flattening, the files would be in 
-# `Split/Split/` which is not what we want. 
+# `Split` which we don't need because we are putting it in the subfolder `Split`. Without flattening, the files would be in
+# `Split/Split/` which is not what we want.
 # If we didn't use subfolder_name, with no flattening then the files would be in `AU_AIMS_Coastline_50k_2024/Split/` which is fine,
-# but when we want to add the Simp version the script would skip the download because it would see that the AU_AIMS_Coastline_50k_2024 
+# but when we want to add the Simp version the script would skip the download because it would see that the AU_AIMS_Coastline_50k_2024
 # folder already exists.
 # The skip checking is done on the dataset name and the subfolder_name.
 direct_download_url = 'https://nextcloud.eatlas.org.au/s/DcGmpS3F5KZjgAG/download?path=%2FV1-1%2F&files=Split'
-downloader.download_and_unzip(direct_download_url, 'AU_AIMS_Coastline_50k_2024', subfolder_name='Split', flatten_directory=True)
+JOBS.append((direct_download_url, 'AU_AIMS_Coastline_50k_2024', {'subfolder_name': 'Split', 'flatten_directory': True}))
 
 # Use this version for overview maps
 direct_download_url = 'https://nextcloud.eatlas.org.au/s/DcGmpS3F5KZjgAG/download?path=%2FV1-1%2F&files=Simp'
-downloader.download_and_unzip(direct_download_url, 'AU_AIMS_Coastline_50k_2024', subfolder_name='Simp', flatten_directory=True)
+JOBS.append((direct_download_url, 'AU_AIMS_Coastline_50k_2024', {'subfolder_name': 'Simp', 'flatten_directory': True}))
 
 # --------------------------------------------------------
 # Natural Earth. (2025). Natural Earth 1:10m Physical Vectors - Land [Shapefile]. https://www.naturalearthdata.com/downloads/10m-physical-vectors/
 direct_download_url = 'https://naciscdn.org/naturalearth/10m/physical/ne_10m_land.zip'
-downloader.download_and_unzip(direct_download_url, 'ne_10m_land')
+JOBS.append((direct_download_url, 'ne_10m_land', {}))
 
 # --------------------------------------------------------
 #Lawrey, E. P., Stewart M. (2016) Complete Great Barrier Reef (GBR) Reef and Island Feature boundaries including Torres Strait (NESP TWQ 3.13, AIMS, TSRA, GBRMPA) [Dataset]. Australian Institute of Marine Science (AIMS), Torres Strait Regional Authority (TSRA), Great Barrier Reef Marine Park Authority [producer]. eAtlas Repository [distributor]. https://eatlas.org.au/data/uuid/d2396b2c-68d4-4f4b-aab0-52f7bc4a81f5
 direct_download_url = 'https://nextcloud.eatlas.org.au/s/xQ8neGxxCbgWGSd/download/TS_AIMS_NESP_Torres_Strait_Features_V1b_with_GBR_Features.zip'
-downloader.download_and_unzip(direct_download_url, 'GBR_AIMS_Complete-GBR-feat_V1b')
-
-# Replace the .prj file for the GBR shapefile because it is using an older WKT format
-# that fails to load correctly in stages 3.
-gbr_shapefile = os.path.join(downloader.download_path, 'GBR_AIMS_Complete-GBR-feat_V1b', 'TS_AIMS_NESP_Torres_Strait_Features_V1b_with_GBR_Features.shp')
-replace_prj_with_epsg_4283(gbr_shapefile)
+JOBS.append((direct_download_url, 'GBR_AIMS_Complete-GBR-feat_V1b', {}))
 
 # --------------------------------------------------------
 # Lawrey, E. (2024). Coral Sea Oceanic Vegetation (NESP MaC 2.3, AIMS) [Data set]. eAtlas. https://doi.org/10.26274/709g-aq12
 direct_download_url = 'https://nextcloud.eatlas.org.au/s/9kqgb45JEwFKKJM/download'
-downloader.download_and_unzip(direct_download_url, 'CS_NESP-MaC-2-3_AIMS_Oceanic-veg', flatten_directory=True)
+JOBS.append((direct_download_url, 'CS_NESP-MaC-2-3_AIMS_Oceanic-veg', {'flatten_directory': True}))
 
 
 # --------------------------------------------------------
@@ -78,109 +234,48 @@ downloader.download_and_unzip(direct_download_url, 'CS_NESP-MaC-2-3_AIMS_Oceanic
 # Also available from https://geoserver.imas.utas.edu.au/geoserver/seamap/wfs?version=1.0.0&request=GetFeature&typeName=SeamapAus_QLD_Halimeda_bioherms_2016&outputFormat=SHAPE-ZIP
 # https://metadata.imas.utas.edu.au/geonetwork/srv/eng/catalog.search#/metadata/b8475bea-e24e-4374-8090-ef06514b951d
 direct_download_url = 'https://static-content.springer.com/esm/art%3A10.1007%2Fs00338-016-1492-2/MediaObjects/338_2016_1492_MOESM1_ESM.zip'
-downloader.download_and_unzip(direct_download_url, 'GBR_USYD_Halimeda-bioherms_2016', flatten_directory=True)
+JOBS.append((direct_download_url, 'GBR_USYD_Halimeda-bioherms_2016', {'flatten_directory': True}))
 
 # --------------------------------------------------------
 # The rough reef mask corresponds to the water estimate
 # masking created for the creation of this dataset
-# Switch to a different download path
-# By convention we use `data/in` for input data that is new data associated with the datasets being created
-# and we use `data/in-3p` for input data that is used in the 3rd party datasets.
-downloader.download_path = "data/in"
-
+# These, and the remaining datasets, are saved under `data/in`.
 direct_download_url = 'https://nextcloud.eatlas.org.au/s/iMrFB9WP9EpLPC2/download?path=%2FV1%2Fin-data%2FAU_Rough-reef-shallow-mask'
-downloader.download_and_unzip(direct_download_url, 'AU_Rough-reef-shallow-mask', flatten_directory=True)
+JOBS.append((direct_download_url, 'AU_Rough-reef-shallow-mask', {'root': IN, 'flatten_directory': True}))
 
 direct_download_url = 'https://nextcloud.eatlas.org.au/s/iMrFB9WP9EpLPC2/download?path=%2FV1%2Fin-data%2FAU_Cleanup-remove-mask'
-downloader.download_and_unzip(direct_download_url, 'AU_Cleanup-remove-mask', flatten_directory=True)
+JOBS.append((direct_download_url, 'AU_Cleanup-remove-mask', {'root': IN, 'flatten_directory': True}))
 
 # --------------------------------------------------------
-# Reef features on the Australian continental shelf derived and aggregated from 
+# Reef features on the Australian continental shelf derived and aggregated from
 # Australian Hydrographic Service's (AHS) seabed area features (sbdare_a) from the 1 degree S57 file series [for NESP D3]
 # https://catalogue.aodn.org.au/geonetwork/srv/eng/catalog.search#/metadata/2e53d926-5d97-4997-b192-dc7dec66943d
 direct_download_url = 'https://data.imas.utas.edu.au/attachments/2e53d926-5d97-4997-b192-dc7dec66943d/sbdare_a_reefs-only.zip'
-downloader.download_and_unzip(direct_download_url, 'AU_NESP-D3_AHO_Reefs')
+JOBS.append((direct_download_url, 'AU_NESP-D3_AHO_Reefs', {'root': IN}))
 
 
 # --------------------------------------------------------
 # Australian land and coastline (including Lord Howe Island) at lowest astronomical tide (LAT) datum [for NESP D3]
 # https://catalogue.aodn.org.au/geonetwork/srv/eng/catalog.search#/metadata/2e53d926-5d97-4997-b192-dc7dec66943d
 direct_download_url = 'https://data.imas.utas.edu.au/attachments/358afb92-4977-4f9f-9c74-e66ad7a6c65a/aho_land_lat.zip'
-downloader.download_and_unzip(direct_download_url, 'AU_NESP-D3_AHO_Land')
+JOBS.append((direct_download_url, 'AU_NESP-D3_AHO_Land', {'root': IN}))
 
 
 # --------------------------------------------------------
-# Hart-Davis Michael, Piccioni Gaia, Dettmering Denise, Schwatke Christian, Passaro Marcello, Seitz Florian (2021). 
+# Hart-Davis Michael, Piccioni Gaia, Dettmering Denise, Schwatke Christian, Passaro Marcello, Seitz Florian (2021).
 # EOT20 - A global Empirical Ocean Tide model from multi-mission satellite altimetry. SEANOE. https://doi.org/10.17882/79489
 #
-# Hart-Davis Michael G., Piccioni Gaia, Dettmering Denise, Schwatke Christian, Passaro Marcello, Seitz Florian (2021). 
+# Hart-Davis Michael G., Piccioni Gaia, Dettmering Denise, Schwatke Christian, Passaro Marcello, Seitz Florian (2021).
 # EOT20: a global ocean tide model from multi-mission satellite altimetry. Earth System Science Data, 13 (8), 3869-3884.
 # https://doi.org/10.5194/essd-13-3869-2021
 
 
 # NOTE: The EOT20 download includes two zip files inside the downloaded zipfile, we only use ocean_tides.zip.
+# These are unpacked after all the downloads have finished (see the post-processing section below).
 direct_download_url = 'https://www.seanoe.org/data/00683/79489/data/85762.zip'
 eot20_folder = 'World_EOT20_2021'
-downloader.download_and_unzip(direct_download_url, eot20_folder)
-
-# Prepare paths for load_tides and ocean_tides zip files
-base_path = os.path.join(downloader.download_path, eot20_folder)
-load_tides_zip = os.path.join(base_path, "load_tides.zip")
-ocean_tides_zip = os.path.join(base_path, "ocean_tides.zip")
-
-# Unzip ocean_tides.zip
-ocean_tides_folder = os.path.join(base_path, "ocean_tides")
-if os.path.exists(ocean_tides_folder):
-    print(f"{ocean_tides_folder} found. Skipping...")
-else:
-    unzip_file(ocean_tides_zip, base_path)
-
-# Remove load_tides.zip as we don't use it in the simulation. Do this to save space.
-if os.path.exists(load_tides_zip):
-    print(f"Removing {load_tides_zip}...")
-    os.remove(load_tides_zip)
-    print(f"{load_tides_zip} removed successfully!")
-
-print("All files are downloaded and prepared.")
-
-# --------------------------------------------------------
-# Tide Gauge Monthly Stats Data
-# Source: http://www.bom.gov.au/oceanography/projects/abslmp/data/monthly.shtml
-# http://www.bom.gov.au/oceanography/projects/ntc/monthly/
-# In this example we are downloading a bunch of files specified from a CSV file.
-
-# Path to the CSV file containing tide gauge data
-tide_gauges_csv = "data/BOM_tide-gauges.csv"
+JOBS.append((direct_download_url, eot20_folder, {'root': IN, 'num_parts': 4}))
 
-# Define the destination folder for the tide gauge monthly stats
-tide_stats_folder = os.path.join(downloader.download_path, "AU_BOM_Monthly-tide-stats")
-os.makedirs(tide_stats_folder, exist_ok=True)
-
-# Open the CSV and iterate through each tide gauge entry
-with open(tide_gauges_csv, newline='') as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        monthly_stats_url = row["MonthlyStatsURL"]
-        # Generate a filename using the tide gauge ID.
-        #file_name = f"{row['ID']}.txt"
-        # Extract the filename from the URL and replace its extension with .txt
-        parsed_url = urlparse(monthly_stats_url)
-        original_filename = os.path.basename(parsed_url.path)
-        file_name = os.path.splitext(original_filename)[0] + '.txt'
-
-        destination_file = os.path.join(tide_stats_folder, file_name)
-
-        # Check if the file already exists
-        if os.path.exists(destination_file):
-            print(f"{destination_file} already exists. Skipping download...")
-            continue
-        
-        print(f"Downloading monthly tide stats for {row['StationName']} from {monthly_stats_url}...")
-        downloader.download(monthly_stats_url, destination_file)
-
-        # Pause for 2 seconds between downloads to avoid overloading the server.
-        time.sleep(1)
-      
 # --------------------------------------------------------
 # Lawrey, E., & Hammerton, M. (2022). Coral Sea features satellite imagery and raw depth contours (Sentinel 2 and Landsat 8) 2015 – 2021 (AIMS) [Data set]. eAtlas. https://doi.org/10.26274/NH77-ZW79
 
@@ -189,56 +284,229 @@ with open(tide_gauges_csv, newline='') as csvfile:
 # the Coral-Sea-Features_Img folder already exists.
 dataset = 'Coral-Sea-Features_Img'
 
-layer = 'S2_R1_DeepFalse'
-direct_download_url = f'https://nextcloud.eatlas.org.au/s/NjbyWRxPoBDDzWg/download?path=%2Flossless%2FCoral-Sea&files={layer}'
-downloader.download_and_unzip(direct_download_url, dataset, subfolder_name = layer, flatten_directory = True)
-
-layer = 'S2_R2_DeepFalse'
-direct_download_url = f'https://nextcloud.eatlas.org.au/s/NjbyWRxPoBDDzWg/download?path=%2Flossless%2FCoral-Sea&files={layer}'
-downloader.download_and_unzip(direct_download_url, dataset, subfolder_name = layer, flatten_directory = True)
-
-layer = 'S2_R1_TrueColour'
-direct_download_url = f'https://nextcloud.eatlas.org.au/s/NjbyWRxPoBDDzWg/download?path=%2Flossless%2FCoral-Sea&files={layer}'
-downloader.download_and_unzip(direct_download_url, dataset, subfolder_name = layer, flatten_directory = True)
-
-# Raw depth contours
-direct_download_url = f'https://nextcloud.eatlas.org.au/s/NjbyWRxPoBDDzWg/download?path=%2Fpoly&files=Coral-Sea'
-downloader.download_and_unzip(direct_download_url, dataset, subfolder_name = 'Raw-depth')
+# Each entry is (files, path, download_and_unzip arguments) for a part of the nextcloud share.
+# They all go to the same host, so the pool reuses its keep-alive connections between them.
+CORAL_SEA_LAYERS = [
+    ('S2_R1_DeepFalse',  '%2Flossless%2FCoral-Sea', {'subfolder_name': 'S2_R1_DeepFalse', 'flatten_directory': True}),
+    ('S2_R2_DeepFalse',  '%2Flossless%2FCoral-Sea', {'subfolder_name': 'S2_R2_DeepFalse', 'flatten_directory': True}),
+    ('S2_R1_TrueColour', '%2Flossless%2FCoral-Sea', {'subfolder_name': 'S2_R1_TrueColour', 'flatten_directory': True}),
+    # Raw depth contours
+    ('Coral-Sea',        '%2Fpoly',                 {'subfolder_name': 'Raw-depth'}),
+]
+for files, path, kwargs in CORAL_SEA_LAYERS:
+    direct_download_url = f'https://nextcloud.eatlas.org.au/s/NjbyWRxPoBDDzWg/download?path={path}&files={files}'
+    JOBS.append((direct_download_url, dataset, {'root': IN, **kwargs}))
 
 # --------------------------------------------------------
 # ICSM (2018) ICSM ANZLIC Committee on Surveying and Mapping Data Product Specification for Composite Gazetteer of Australia, The Intergovernmental Committee on Surveying and Mapping. Accessed from https://placenames.fsdf.org.au/ on 23 Jan 2025
 # https://s3.ap-southeast-2.amazonaws.com/fsdf.placenames/DPS/Composite+Gazetteer+DPS.pdf
-direct_download_url = 'https://d1tuzeg87mu4oi.cloudfront.net/PlaceNames.gpkg'
-downloader.download(direct_download_url, 'AU_ICSM_Gazetteer_2018')
+# This is a single file rather than a zip, so main() starts it in the background straight away with prefetch.
+# It downloads while the JOBS run and the EOT20 files are unzipped, and we wait for it at the end.
+gazetteer_dataset = 'AU_ICSM_Gazetteer_2018'
+gazetteer_url = 'https://d1tuzeg87mu4oi.cloudfront.net/PlaceNames.gpkg'
+gazetteer_path = os.path.join(IN, f'{gazetteer_dataset}.gpkg')
 
 
 # --------------------------------------------------------
 # Geoscience Australia (2021). Kenn and Chesterfield Plateaux bathymetry survey (FK210206/GA4869) [Dataset]. Geoscience Australia, Canberra. https://doi.org/10.26186/145381
 # https://dx.doi.org/10.26186/145381
 direct_download_url = 'https://files.ausseabed.gov.au/survey/Kenn%20and%20Chesterfield%20Plateaux%20Bathymetry%202021%2064m.zip'
-downloader.download_and_unzip(direct_download_url, 'CS_GA_Kenn-Chesterfield-Bathy')
+JOBS.append((direct_download_url, 'CS_GA_Kenn-Chesterfield-Bathy', {'root': IN}))
 
 # --------------------------------------------------------
 # Geoscience Australia (2020). Northern Depths of the Great Barrier Reef bathymetry survey (FK200930/GA4866) [Dataset]. Geoscience Australia, Canberra. http://pid.geoscience.gov.au/dataset/ga/144545
 direct_download_url = 'https://files.ausseabed.gov.au/survey/Northern%20Great%20Barrier%20Reef%20Bathymetry%202020%2064m.zip'
-downloader.download_and_unzip(direct_download_url, 'CS_GA_North-GBR-Bathy')
+JOBS.append((direct_download_url, 'CS_GA_North-GBR-Bathy', {'root': IN}))
 
 # --------------------------------------------------------
 # Spinoccia, M., Brooke, B., Nichol, S., & Beaman, R. (2020). Seamounts, Canyons and Reefs of the Coral Sea bathymetry survey (FK200802/GA0365) [Dataset]. Commonwealth of Australia (Geoscience Australia). https://doi.org/10.26186/144385
 direct_download_url = 'https://files.ausseabed.gov.au/survey/Coral%20Sea%20Canyons%20and%20Reef%20Bathymetry%202020%2016m%20-%2064m.zip'
-downloader.download_and_unzip(direct_download_url, 'CS_GA_Coral-Sea-Canyons')
+JOBS.append((direct_download_url, 'CS_GA_Coral-Sea-Canyons', {'root': IN, 'num_parts': 4}))
 
 # --------------------------------------------------------
 # Beaman, R., Duncan, P., Smith, D., Rais, K., Siwabessy, P.J.W., Spinoccia, M. (2020). Visioning the Coral Sea Marine Park bathymetry survey (FK200429/GA4861). Geoscience Australia, Canberra. https://dx.doi.org/10.26186/140048
 direct_download_url = 'https://files.ausseabed.gov.au/survey/Visioning%20the%20Coral%20Sea%20Bathymetry%202020%2016m%20-%2064m.zip'
-downloader.download_and_unzip(direct_download_url, 'CS_GA_Visioning-Coral-Sea-Bathy')
+JOBS.append((direct_download_url, 'CS_GA_Visioning-Coral-Sea-Bathy', {'root': IN, 'num_parts': 4}))
 
 # --------------------------------------------------------
 # Beaman, R. (2020). High-resolution depth model for the Great Barrier Reef and Coral Sea - 100 m [Dataset]. Geoscience Australia. http://doi.org/10.26186/5e2f8bb629d07
 direct_download_url = 'https://files.ausseabed.gov.au/survey/Great%20Barrier%20Reef%20Bathymetry%202020%20100m.zip'
-downloader.download_and_unzip(direct_download_url, 'CS_GA_GBR100-2020-Bathy')
+JOBS.append((direct_download_url, 'CS_GA_GBR100-2020-Bathy', {'root': IN, 'num_parts': 4}))
 
 # --------------------------------------------------------
 # Beaman, R. (2017). High-resolution depth model for the Great Barrier Reef - 30 m [Dataset]. Geoscience Australia. http://dx.doi.org/10.4225/25/5a207b36022d2
 direct_download_url = 'https://files.ausseabed.gov.au/survey/Great%20Barrier%20Reef%20Bathymetry%202020%2030m.zip'
-downloader.download_and_unzip(direct_download_url, 'CS_GA_GBR30-2020-Bathy')
+JOBS.append((direct_download_url, 'CS_GA_GBR30-2020-Bathy', {'root': IN, 'num_parts': 4}))
+
+
+# --------------------------------------------------------
+# Run the downloads. The semaphores and rate limiters are looked up here, in the
+# main thread, so that each host only ever gets a single one of each.
+# A single line is printed as each job finishes to show the overall progress.
+def download_datasets(jobs):
+    done_lock = threading.Lock()
+    done_count = 0
+
+    def report_done(future, dataset_name):
+        nonlocal done_count
+        with done_lock:
+            done_count += 1
+            status = "failed" if future.exception() is not None else "done"
+            print(f"[{done_count}/{len(jobs)}] {dataset_name} {status}")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = []
+        for url, dataset_name, kwargs in interleave_by_host(jobs):
+            host = urlparse(url).netloc
+            # download_and_unzip skips the job if this folder exists, unless asked to revalidate it
+            target = os.path.join(kwargs.get('root', downloader.download_path), dataset_name,
+                                  kwargs.get('subfolder_name') or '')
+            future = executor.submit(run_with_host_limit, host_limits[host], rate_limit_for(host),
+                                     None if kwargs.get('revalidate') else target,
+                                     downloader.download_and_unzip, url, dataset_name, **kwargs)
+            future.add_done_callback(lambda f, name=dataset_name: report_done(f, name))
+            futures.append(future)
+        # Raise the first download error (if any) once all the downloads have finished.
+        for future in futures:
+            future.result()
+
+# --------------------------------------------------------
+# Post-processing, once all the downloads have completed.
+
+# Replace the .prj file for the GBR shapefile because it is using an older WKT format
+# that fails to load correctly in stages 3.
+def fix_gbr_features_prj():
+    gbr_shapefile = os.path.join(IN_3P, 'GBR_AIMS_Complete-GBR-feat_V1b', 'TS_AIMS_NESP_Torres_Strait_Features_V1b_with_GBR_Features.shp')
+    replace_prj_with_epsg_4283(gbr_shapefile)
+
+def prepare_eot20():
+    # Prepare paths for load_tides and ocean_tides zip files
+    base_path = os.path.join(IN, eot20_folder)
+    load_tides_zip = os.path.join(base_path, "load_tides.zip")
+    ocean_tides_zip = os.path.join(base_path, "ocean_tides.zip")
+
+    # Unzip ocean_tides.zip, then remove it as only the extracted files are used. Do this to save space.
+    # The zip is only removed once the extraction has finished, so while it is present an earlier
+    # extraction may have been interrupted; unzip_file skips the entries already extracted.
+    if not os.path.exists(ocean_tides_zip):
+        print(f"{ocean_tides_zip} already extracted. Skipping...")
+    else:
+        unzip_file(ocean_tides_zip, base_path)
+        print(f"Removing {ocean_tides_zip}...")
+        os.remove(ocean_tides_zip)
+
+    # Remove load_tides.zip as we don't use it in the simulation. Do this to save space.
+    if os.path.exists(load_tides_zip):
+        print(f"Removing {load_tides_zip}...")
+        os.remove(load_tides_zip)
+        print(f"{load_tides_zip} removed successfully!")
+
+# --------------------------------------------------------
+# Tide Gauge Monthly Stats Data
+# Source: http://www.bom.gov.au/oceanography/projects/abslmp/data/monthly.shtml
+# http://www.bom.gov.au/oceanography/projects/ntc/monthly/
+# In this example we are downloading a bunch of files specified from a CSV file.
+
+# Path to the CSV file containing tide gauge data
+tide_gauges_csv = "data/BOM_tide-gauges.csv"
+
+# Define the destination folder for the tide gauge monthly stats
+tide_stats_dataset = "AU_BOM_Monthly-tide-stats"
+tide_stats_folder = os.path.join(IN, tide_stats_dataset)
+
+# The tide gauge files are many small files from a single host, so this pass has its
+# own pool sized to the number of requests we are happy to have in flight to BOM at
+# once. Every worker can then be downloading, rather than most of them waiting on the
+# host semaphore, and the downloader reuses one keep-alive connection per worker.
+TIDE_GAUGE_WORKERS = 4
+
+# Download a single tide gauge file. The rate limiter spaces out the requests to
+# avoid overloading the server; files that already exist are skipped before we get
+# here so they don't cost any waiting.
+def download_tide_gauge(rate_limit, station_name, monthly_stats_url, destination_file):
+    rate_limit.wait()
+    print(f"Downloading monthly tide stats for {station_name} from {monthly_stats_url}...")
+    downloader.download(monthly_stats_url, destination_file)
+
+def download_tide_gauges():
+    os.makedirs(tide_stats_folder, exist_ok=True)
+
+    # List the files we already have once, rather than checking for each file in turn.
+    existing = set(os.listdir(tide_stats_folder))
+
+    # Open the CSV and submit a download for each tide gauge entry
+    with open(tide_gauges_csv, newline='') as csvfile, ThreadPoolExecutor(max_workers=TIDE_GAUGE_WORKERS) as executor:
+        futures = []
+        # Look up the columns we need once, from the header, rather than building a dict per row
+        reader = csv.reader(csvfile)
+        header = next(reader)
+        url_i = header.index("MonthlyStatsURL")
+        name_i = header.index("StationName")
+        for row in reader:
+            monthly_stats_url = row[url_i]
+            station_name = row[name_i]
+            # Generate a filename using the tide gauge ID.
+            #file_name = f"{row[header.index('ID')]}.txt"
+            # Extract the filename from the URL and replace its extension with .txt
+            parsed_url = urlparse(monthly_stats_url)
+            original_filename = os.path.basename(parsed_url.path)
+            file_name = os.path.splitext(original_filename)[0] + '.txt'
+
+            destination_file = os.path.join(tide_stats_folder, file_name)
+
+            # Check if the file already exists, or has already been submitted for download
+            if file_name in existing:
+                print(f"{destination_file} already exists. Skipping download...")
+                continue
+            existing.add(file_name)
+
+            futures.append(executor.submit(download_tide_gauge, rate_limit_for(parsed_url.netloc),
+                                           station_name, monthly_stats_url, destination_file))
+        for future in futures:
+            future.result()
+
+# --------------------------------------------------------
+# Command line entry point.
+# With no arguments all the datasets are downloaded. `--only <dataset_name>` restricts the run
+# to the named dataset(s), which lets CI spread the datasets over several processes, e.g.
+#   python example-download-input-data.py --list | xargs -P 8 -n 1 python example-download-input-data.py --only
+def main(argv):
+    parser = argparse.ArgumentParser(description="Download the source datasets.")
+    parser.add_argument("--only", action="append", metavar="DATASET_NAME",
+                        help="Only download this dataset. May be given more than once.")
+    parser.add_argument("--list", action="store_true", help="List the dataset names and exit.")
+    args = parser.parse_args(argv[1:])
+
+    all_datasets = list(dict.fromkeys([dataset_name for _, dataset_name, _ in JOBS] +
+                                      [gazetteer_dataset, tide_stats_dataset]))
+    if args.list:
+        print("\n".join(all_datasets))
+        return
+    selected = set(args.only) if args.only else set(all_datasets)
+    unknown = selected - set(all_datasets)
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+
+    print("Downloading source data files. This will take a while ...")
+
+    gazetteer_download = None
+    if gazetteer_dataset in selected:
+        gazetteer_download = downloader.prefetch(gazetteer_url, gazetteer_path)
+
+    download_datasets([job for job in JOBS if job[1] in selected])
+
+    if 'GBR_AIMS_Complete-GBR-feat_V1b' in selected:
+        fix_gbr_features_prj()
+    if eot20_folder in selected:
+        prepare_eot20()
+    if gazetteer_download is not None:
+        gazetteer_download.result()
+
+    print("All files are downloaded and prepared.")
+
+    if tide_stats_dataset in selected:
+        download_tide_gauges()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -1,8 +1,13 @@
+import io
 import os
 import shutil
 import tempfile
+import threading
+import http.server
 import pytest
 
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
 @pytest.fixture()
 def tmp_download_dir(tmp_path):
     # Dedicated per-test download folder
@@ -25,3 +30,79 @@ def gh_base_url():
     if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in ('"', "'"):
         raw = raw[1:-1]
     return raw.rstrip('/')
+
+
+class _AssetRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves tests/assets over HTTP/1.1 (keep-alive) and records each request.
+    Single byte-range requests are supported unless `server.support_ranges` is False. If
+    `server.range_start` is set, every range is served from that offset instead of the one asked for.
+    An If-Range header that doesn't match the file's Last-Modified gets the whole file. If
+    `server.status` is set, every request is answered with that status and no body. HEAD requests
+    are rejected with 405 if `server.reject_head` is True."""
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=ASSETS_DIR, **kwargs)
+
+    def send_head(self):
+        self.server.requests.append((self.command, self.path, self.client_address))
+        if self.server.status is not None:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        range_header = self.headers.get("Range")
+        path = self.translate_path(self.path)
+        if not self.server.support_ranges or range_header is None or not os.path.isfile(path):
+            return super().send_head()
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range != self.date_time_string(int(os.stat(path).st_mtime)):
+            return super().send_head()
+        with open(path, "rb") as f:
+            data = f.read()
+        start, end = range_header.split("=", 1)[1].split("-", 1)
+        start = int(start) if self.server.range_start is None else self.server.range_start
+        end = min(int(end), len(data) - 1) if end else len(data) - 1
+        if start >= len(data):
+            self.send_error(416)
+            return None
+        body = data[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def do_HEAD(self):
+        if self.server.reject_head:
+            self.server.requests.append((self.command, self.path, self.client_address))
+            self.send_error(405)
+            return
+        super().do_HEAD()
+
+    def end_headers(self):
+        if self.server.support_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def local_server():
+    """Local HTTP server for offline tests. Yields the server; the base URL is `server.base_url`
+    and `server.requests` lists (method, path, client_address) for every request received."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _AssetRequestHandler)
+    server.requests = []
+    server.support_ranges = True
+    server.range_start = None
+    server.status = None
+    server.reject_head = False
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -1,7 +1,13 @@
 import os
+import json
+import socket
+import hashlib
+import contextlib
+import email.utils
 import zipfile
 import tempfile
 import shutil
+import urllib.error
 from pathlib import Path
 from unittest.mock import patch
 
@@ -90,7 +96,7 @@ def test_flatten_extracts_via_short_temp_path(tmp_path):
     _make_nested_zip(zip_path, "deep-inner-folder", ["a.txt", "b.csv"])
 
     # Patch download() so it just copies our local ZIP instead of hitting the network
-    def fake_download(self_inner, url, path):
+    def fake_download(self_inner, url, path, **kwargs):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         shutil.copy2(zip_path, path)
 
@@ -117,7 +123,7 @@ def test_flatten_no_extract_beside_destination(tmp_path):
     zip_path = str(tmp_path / "test.zip")
     _make_nested_zip(zip_path, "inner", ["file.txt"])
 
-    def fake_download(self_inner, url, path):
+    def fake_download(self_inner, url, path, **kwargs):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         shutil.copy2(zip_path, path)
 
@@ -145,7 +151,7 @@ def test_no_flatten_still_uses_original_path(tmp_path):
     with zipfile.ZipFile(zip_path, "w") as z:
         z.writestr("root-file.txt", "hello\n")
 
-    def fake_download(self_inner, url, path):
+    def fake_download(self_inner, url, path, **kwargs):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         shutil.copy2(zip_path, path)
 
@@ -168,7 +174,7 @@ def test_flatten_with_subfolder(tmp_path):
     zip_path = str(tmp_path / "test.zip")
     _make_nested_zip(zip_path, "wrapper", ["data.txt"])
 
-    def fake_download(self_inner, url, path):
+    def fake_download(self_inner, url, path, **kwargs):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         shutil.copy2(zip_path, path)
 
@@ -183,3 +189,497 @@ def test_flatten_with_subfolder(tmp_path):
     dest = Path(download_dir) / "ds" / "v1"
     assert (dest / "data.txt").exists()
     assert not (dest / "wrapper").exists()
+
+
+# ---------------------------------------------------------------------------
+# Offline tests against a local HTTP server
+# ---------------------------------------------------------------------------
+
+def test_download_reuses_connection(tmp_path, local_server):
+    """Downloads from the same host should share one keep-alive connection."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    dd.download(f"{local_server.base_url}/text.txt", str(tmp_path / "a.txt"))
+    dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(tmp_path / "b.zip"))
+
+    assert "tiny test asset" in (tmp_path / "a.txt").read_text(encoding="utf-8")
+    assert zipfile.is_zipfile(tmp_path / "b.zip")
+    client_addresses = {address for _, _, address in local_server.requests}
+    assert len(local_server.requests) == 2
+    assert len(client_addresses) == 1
+
+
+@pytest.mark.parametrize("status", [300, 302, 304])
+def test_download_non_2xx_raises(tmp_path, local_server, status):
+    """A 3xx that isn't followed as a redirect is an error, not an empty file."""
+    local_server.status = status
+    dd = DataDownloader(download_path=str(tmp_path))
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        dd.download(f"{local_server.base_url}/text.txt", str(tmp_path / "text.txt"))
+    assert excinfo.value.code == status
+    assert not (tmp_path / "text.txt").exists()
+
+
+def test_download_reconnects_after_connection_aborted(tmp_path, local_server):
+    """A pooled connection the server has closed (ConnectionAbortedError on Windows) is replaced."""
+    class AbortedConnection:
+        closed = False
+
+        def request(self, *args, **kwargs):
+            raise ConnectionAbortedError("An established connection was aborted")
+
+        def close(self):
+            self.closed = True
+
+    dd = DataDownloader(download_path=str(tmp_path))
+    url = f"{local_server.base_url}/text.txt"
+    stale = AbortedConnection()
+    dd._pool._idle[("http", "127.0.0.1", local_server.server_address[1])] = [stale]
+    dd.download(url, str(tmp_path / "text.txt"))
+
+    assert stale.closed
+    assert "tiny test asset" in (tmp_path / "text.txt").read_text(encoding="utf-8")
+
+
+def test_download_http_error_raises(tmp_path, local_server):
+    """Error responses raise HTTPError and don't leave a destination file behind."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    dest = tmp_path / "missing.txt"
+    with pytest.raises(urllib.error.HTTPError):
+        dd.download(f"{local_server.base_url}/does-not-exist.txt", str(dest))
+    assert not dest.exists()
+
+
+def _write_partial_download(dest, data, asset_name):
+    """Leaves `data` as an interrupted download of `asset_name` (from local_server) at `dest`."""
+    Path(str(dest) + ".tmp").write_bytes(data)
+    mtime = os.stat(Path(__file__).parent / "assets" / asset_name).st_mtime
+    Path(str(dest) + ".tmp.validator").write_text(email.utils.formatdate(int(mtime), usegmt=True))
+
+
+@pytest.mark.parametrize("support_ranges,partial", [(True, 20), (False, 20), (True, 10 ** 6)])
+def test_download_resumes_partial_file(tmp_path, local_server, support_ranges, partial):
+    """A partial download left in `<path>.tmp` is completed with a Range request; if the
+    server ignores the range, or the partial file can't be the start of it, the whole
+    file is downloaded again."""
+    local_server.support_ranges = support_ranges
+    asset = (Path(__file__).parent / "assets" / "file-in-root-folder.zip").read_bytes()
+    dest = tmp_path / "resume.zip"
+    _write_partial_download(dest, asset[:partial] if partial < len(asset) else b"x" * partial,
+                            "file-in-root-folder.zip")
+
+    dd = DataDownloader(download_path=str(tmp_path))
+    result = dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(dest))
+
+    assert dest.read_bytes() == asset
+    assert result["sha256"] == hashlib.sha256(asset).hexdigest()
+    assert result["content_length"] == len(asset)
+    assert not Path(str(dest) + ".tmp").exists()
+    assert not Path(str(dest) + ".tmp.validator").exists()
+
+
+def test_download_does_not_resume_changed_file(tmp_path, local_server):
+    """If the file has changed since the partial download, If-Range gets the whole new file."""
+    asset = (Path(__file__).parent / "assets" / "file-in-root-folder.zip").read_bytes()
+    dest = tmp_path / "resume.zip"
+    _write_partial_download(dest, b"old version of the file", "file-in-root-folder.zip")
+    Path(str(dest) + ".tmp.validator").write_text("Thu, 01 Jan 2015 00:00:00 GMT")
+
+    dd = DataDownloader(download_path=str(tmp_path))
+    dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(dest))
+
+    assert dest.read_bytes() == asset
+    assert len(local_server.requests) == 1
+
+
+def test_download_restarts_when_server_sends_other_range(tmp_path, local_server):
+    """A 206 that doesn't start where the partial file ends isn't appended to it."""
+    local_server.range_start = 10
+    asset = (Path(__file__).parent / "assets" / "file-in-root-folder.zip").read_bytes()
+    dest = tmp_path / "resume.zip"
+    _write_partial_download(dest, asset[:20], "file-in-root-folder.zip")
+
+    dd = DataDownloader(download_path=str(tmp_path))
+    dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(dest))
+
+    assert dest.read_bytes() == asset
+    assert [request[1] for request in local_server.requests] == ["/file-in-root-folder.zip"] * 2
+
+
+def test_download_in_parts_cleans_up_on_error(tmp_path, local_server):
+    """A failed ranged download doesn't leave its preallocated file behind."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    dest = tmp_path / "parts.zip"
+
+    def failing_open(file, mode="r", *args, **kwargs):
+        if mode == "r+b":
+            raise OSError("disk error")
+        return open(file, mode, *args, **kwargs)
+
+    with patch("data_downloader.open", failing_open, create=True), pytest.raises(OSError, match="disk error"):
+        dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(dest), num_parts=3)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_times_out(tmp_path):
+    """A server that accepts the connection but never responds fails after `timeout` seconds."""
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+        dd = DataDownloader(download_path=str(tmp_path), timeout=0.5)
+        with pytest.raises(OSError):
+            dd.download(f"http://127.0.0.1:{port}/slow.txt", str(tmp_path / "slow.txt"))
+
+
+def test_download_in_parts(tmp_path, local_server):
+    """With num_parts > 1 the file is fetched as concurrent byte ranges and reassembled,
+    replacing any partial single stream download."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    dest = tmp_path / "parts.zip"
+    _write_partial_download(dest, b"partial", "file-in-root-folder.zip")
+    dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(dest), num_parts=3)
+
+    expected = Path(__file__).parent / "assets" / "file-in-root-folder.zip"
+    assert dest.read_bytes() == expected.read_bytes()
+    ranged = [path for method, path, _ in local_server.requests if method == "GET"]
+    assert len(ranged) == 3
+    assert sorted(os.listdir(tmp_path)) == ["parts.zip"]
+
+
+def test_download_in_parts_falls_back_without_ranges(tmp_path, local_server):
+    """Servers that don't support ranges are downloaded with a single request."""
+    local_server.support_ranges = False
+    dd = DataDownloader(download_path=str(tmp_path))
+    dest = tmp_path / "text.txt"
+    dd.download(f"{local_server.base_url}/text.txt", str(dest), num_parts=4)
+
+    assert "tiny test asset" in dest.read_text(encoding="utf-8")
+    assert [method for method, _, _ in local_server.requests] == ["HEAD", "GET"]
+
+
+def test_download_in_parts_falls_back_when_head_rejected(tmp_path, local_server):
+    """Servers that reject HEAD (e.g. signed S3 URLs) are downloaded as a single stream."""
+    local_server.reject_head = True
+    asset = (Path(__file__).parent / "assets" / "file-in-root-folder.zip").read_bytes()
+    dd = DataDownloader(download_path=str(tmp_path))
+    dd.download(f"{local_server.base_url}/file-in-root-folder.zip", str(tmp_path / "a.zip"), num_parts=4)
+
+    assert (tmp_path / "a.zip").read_bytes() == asset
+    assert [method for method, _, _ in local_server.requests] == ["HEAD", "GET"]
+
+
+def test_download_and_unzip_revalidate(tmp_path, local_server):
+    """Revalidation skips unchanged downloads and re-downloads changed ones."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    url = f"{local_server.base_url}/file-in-root-folder.zip"
+    dd.download_and_unzip(url, dataset_name="root_zip")
+
+    meta_path = tmp_path / "root_zip" / ".download.meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    assert meta["url"] == url
+    assert meta["last_modified"]
+
+    # The server reports the file as unchanged (304), so nothing is downloaded
+    local_server.requests.clear()
+    dd.download_and_unzip(url, dataset_name="root_zip", revalidate=True)
+    assert [method for method, _, _ in local_server.requests] == ["HEAD"]
+
+    # Pretend our copy is older than the server's, so the dataset is replaced
+    meta["last_modified"] = "Thu, 01 Jan 1970 00:00:00 GMT"
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    (tmp_path / "root_zip" / "stale.txt").write_text("old", encoding="utf-8")
+    local_server.requests.clear()
+    dd.download_and_unzip(url, dataset_name="root_zip", revalidate=True)
+    assert [method for method, _, _ in local_server.requests] == ["HEAD", "GET"]
+    assert (tmp_path / "root_zip" / "keep.txt").exists()
+    assert not (tmp_path / "root_zip" / "stale.txt").exists()
+
+
+@pytest.mark.parametrize("flatten_directory", [False, True])
+def test_download_and_unzip_revalidate_keeps_existing_copy(tmp_path, local_server, flatten_directory):
+    """A failed check or a bad replacement archive leaves the existing dataset in place."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    url = f"{local_server.base_url}/file-in-root-folder.zip"
+    dd.download_and_unzip(url, dataset_name="root_zip", flatten_directory=flatten_directory)
+    meta_path = tmp_path / "root_zip" / ".download.meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["last_modified"] = "Thu, 01 Jan 1970 00:00:00 GMT"
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+    # The server rejects HEAD, so updates can't be checked and the dataset is kept
+    local_server.reject_head = True
+    dd.download_and_unzip(url, dataset_name="root_zip", flatten_directory=flatten_directory, revalidate=True)
+    assert (tmp_path / "root_zip" / "keep.txt").exists()
+
+    # The new archive fails to extract, so the old copy is still there
+    local_server.reject_head = False
+    with patch.object(DataDownloader, "unzip", side_effect=zipfile.BadZipFile("corrupt")), \
+            pytest.raises(zipfile.BadZipFile):
+        dd.download_and_unzip(url, dataset_name="root_zip", flatten_directory=flatten_directory, revalidate=True)
+    assert (tmp_path / "root_zip" / "keep.txt").exists()
+
+    dd.download_and_unzip(url, dataset_name="root_zip", flatten_directory=flatten_directory, revalidate=True)
+    assert (tmp_path / "root_zip" / "keep.txt").exists()
+    assert sorted(os.listdir(tmp_path)) == ["root_zip"]
+
+
+def test_prefetch_returns_future(tmp_path, local_server):
+    """prefetch downloads in the background and resolves to the destination path."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    dest = str(tmp_path / "sub" / "text.txt")
+    future = dd.prefetch(f"{local_server.base_url}/text.txt", dest)
+
+    assert future.result(timeout=30) == dest
+    assert "tiny test asset" in Path(dest).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("in_memory_limit", [0, 64 * 1024 * 1024])
+def test_download_and_unzip_small_zip_in_memory(tmp_path, local_server, in_memory_limit):
+    """ZIPs below the in-memory limit are extracted without writing the ZIP to disk."""
+    dd = DataDownloader(download_path=str(tmp_path), in_memory_limit=in_memory_limit)
+    sources = []
+    real_unzip = DataDownloader.unzip
+
+    def spy_unzip(self_inner, zip_file_path, *args):
+        sources.append(zip_file_path)
+        return real_unzip(self_inner, zip_file_path, *args)
+
+    with patch.object(DataDownloader, "unzip", spy_unzip):
+        dd.download_and_unzip(f"{local_server.base_url}/file-in-subfolder.zip", "ds", flatten_directory=True)
+
+    assert (tmp_path / "ds" / "inner.txt").exists()
+    assert isinstance(sources[0], str) == (in_memory_limit == 0)
+
+
+def test_downloader_has_no_instance_dict(tmp_path):
+    """__slots__ stops misspelt attributes from being silently created."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    with pytest.raises(AttributeError):
+        dd.download_pth = "elsewhere"
+
+
+def test_tmp_path_created_on_first_use(tmp_path):
+    dd = DataDownloader(download_path=str(tmp_path))
+    assert dd._tmp is None
+    tmp_dir = dd.tmp_path.name
+    assert os.path.isdir(tmp_dir)
+    assert dd.tmp_path.name == tmp_dir
+    dd.close()
+    assert not os.path.exists(tmp_dir)
+
+
+def test_context_manager_closes_connections(tmp_path, local_server):
+    """Leaving the with block waits for prefetches and closes the pooled connections."""
+    with DataDownloader(download_path=str(tmp_path)) as dd:
+        future = dd.prefetch(f"{local_server.base_url}/text.txt", str(tmp_path / "text.txt"))
+    assert future.done()
+    assert dd._pool._idle == {}
+    assert dd._executor is None
+
+
+def test_download_many(tmp_path, local_server):
+    """download_many fetches every URL to its own path."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    names = ["text.txt", "file-in-root-folder.zip"]
+    url_to_path = {f"{local_server.base_url}/{name}": str(tmp_path / name) for name in names}
+    results = dd.download_many(url_to_path, concurrency=2)
+
+    assert set(results) == set(url_to_path)
+    for name in names:
+        expected = Path(__file__).parent / "assets" / name
+        assert (tmp_path / name).read_bytes() == expected.read_bytes()
+
+
+def test_progress_is_timed_per_download(tmp_path, capsys):
+    """Each download reports against its own start time, even one started in the same clock tick."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    with patch("data_downloader.time.monotonic", return_value=100.0):
+        dd._reporthook(2 * 1024 * 1024, 4 * 1024 * 1024, start_time=100.0)
+        dd._reporthook(2 * 1024 * 1024, -1, start_time=98.0)
+    first, second = capsys.readouterr().out.split("\r")[:2]
+    assert first.startswith("50%, 2 MB, 0 KB/s, 0 secs")
+    assert second.startswith("2 MB, 1024 KB/s, 2 secs")
+
+
+def test_download_and_unzip_root_overrides_download_path(tmp_path):
+    """root= places the dataset under a different base directory for that call only."""
+    dd = DataDownloader(download_path=str(tmp_path / "in-3p"))
+    zip_path = str(tmp_path / "test.zip")
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.writestr("root-file.txt", "hello\n")
+
+    def fake_download(self_inner, url, path, **kwargs):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copy2(zip_path, path)
+
+    with patch.object(DataDownloader, "download", fake_download):
+        dd.download_and_unzip(url="http://fake/test.zip", dataset_name="simple", root=tmp_path / "in")
+
+    assert (tmp_path / "in" / "simple" / "root-file.txt").exists()
+    assert not (tmp_path / "in-3p").exists()
+    assert dd.download_path == str(tmp_path / "in-3p")
+
+
+def test_isal_used_for_zip_decompression_when_installed(tmp_path):
+    """With python-isal installed zipfile inflates through it; compression still uses zlib."""
+    isal_zlib = pytest.importorskip("isal.isal_zlib")
+    import zlib
+
+    zip_path = tmp_path / "test.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr("data.txt", "isal " * 100000)
+    DataDownloader(download_path=str(tmp_path)).unzip(str(zip_path), str(tmp_path / "out"), "")
+
+    # zipfile is switched over when the downloader first uses it
+    assert zipfile.zlib.decompressobj is isal_zlib.decompressobj
+    assert zipfile.zlib.compressobj is zlib.compressobj
+    assert (tmp_path / "out" / "data.txt").read_bytes() == b"isal " * 100000
+
+
+def test_isal_does_not_replace_another_zlib(tmp_path):
+    """A zlib replacement the caller has already given zipfile (e.g. zlib-ng) is kept."""
+    pytest.importorskip("isal.isal_zlib")
+    import types
+    import zlib
+    import data_downloader
+
+    other_zlib = types.ModuleType("zlib_ng")
+    other_zlib.__dict__.update(zlib.__dict__)
+    with patch.object(zipfile, "zlib", other_zlib), patch.object(data_downloader, "_zipfile", None):
+        data_downloader._import_zipfile()
+        assert zipfile.zlib is other_zlib
+
+
+def test_unzip_in_parallel(tmp_path):
+    """Large ZIPs are extracted by several threads with the same result as extractall."""
+    dd = DataDownloader(download_path=str(tmp_path))
+    zip_path = str(tmp_path / "test.zip")
+    names = [f"dir{i % 3}/sub/file{i}.txt" for i in range(20)] + ["root.txt"]
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr("empty-dir/", "")
+        for name in names:
+            z.writestr(name, f"content of {name}\n" * 1000)
+
+    with patch.object(DataDownloader, "_PARALLEL_UNZIP_MIN_SIZE", 0):
+        dd.unzip(zip_path, str(tmp_path / "out"), "")
+
+    for name in names:
+        assert (tmp_path / "out" / name).read_text() == f"content of {name}\n" * 1000
+    assert (tmp_path / "out" / "empty-dir").is_dir()
+    assert not (tmp_path / "out_tmp").exists()
+
+
+@pytest.mark.parametrize("copy_file_range_stops", [False, True])
+def test_move_files_between_filesystems(tmp_path, copy_file_range_stops):
+    """When a rename fails with EXDEV the files are copied and the originals removed, even if
+    copy_file_range stops early (returns 0) and shutil.copyfile has to finish the copy."""
+    import errno
+    import data_downloader
+
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_text("a" * 100000)
+    (src / "folder").mkdir()
+    (src / "folder" / "b.txt").write_text("b")
+
+    def cross_device_replace(a, b):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    dd = DataDownloader(download_path=str(tmp_path))
+    with patch.object(data_downloader.os, "replace", cross_device_replace), contextlib.ExitStack() as stack:
+        if copy_file_range_stops:
+            stack.enter_context(patch.object(data_downloader.os, "copy_file_range", lambda *args: 0, create=True))
+        dd.move_files(["*"], str(src), str(tmp_path / "dst"))
+
+    assert (tmp_path / "dst" / "a.txt").read_text() == "a" * 100000
+    assert (tmp_path / "dst" / "folder" / "b.txt").read_text() == "b"
+    assert os.listdir(src) == []
+
+
+def test_keep_subset_extracts_only_matching_members(tmp_path):
+    """Patterns are globs from the ZIP root; matching folders keep their contents."""
+    dd = DataDownloader(download_path=str(tmp_path / "downloads"))
+    zip_path = str(tmp_path / "test.zip")
+    with zipfile.ZipFile(zip_path, "w") as z:
+        for name in ["keep.txt", "drop.csv", "tides/a.nc", "tides/deep/b.nc", "other/c.nc"]:
+            z.writestr(name, name)
+
+    def fake_download(self_inner, url, path, **kwargs):
+        shutil.copy2(zip_path, path)
+
+    opened = []
+    real_open = zipfile.ZipFile.open
+
+    def spy_open(self_inner, name, *args, **kwargs):
+        opened.append(getattr(name, "filename", name))
+        return real_open(self_inner, name, *args, **kwargs)
+
+    with patch.object(DataDownloader, "download", fake_download), \
+            patch.object(zipfile.ZipFile, "open", spy_open):
+        dd.download_unzip_keep_subset("http://fake/test.zip", ["*.txt", "tides"], dataset_name="subset")
+
+    base = tmp_path / "downloads" / "subset"
+    kept = sorted(p.relative_to(base).as_posix() for p in base.rglob("*") if p.is_file())
+    assert kept == ["keep.txt", "tides/a.nc", "tides/deep/b.nc"]
+    assert sorted(opened) == ["keep.txt", "tides/a.nc", "tides/deep/b.nc"]
+    assert os.listdir(tmp_path / "downloads") == ["subset"]
+
+
+def test_keep_subset_completes_after_interrupted_extraction(tmp_path):
+    """A failed extraction leaves no dataset folder, so the next call extracts everything."""
+    dd = DataDownloader(download_path=str(tmp_path / "downloads"))
+    zip_path = str(tmp_path / "test.zip")
+    names = [f"f{i}.txt" for i in range(5)]
+    with zipfile.ZipFile(zip_path, "w") as z:
+        for name in names:
+            z.writestr(name, name)
+
+    def fake_download(self_inner, url, path, **kwargs):
+        shutil.copy2(zip_path, path)
+
+    real_open = zipfile.ZipFile.open
+
+    def failing_open(self_inner, name, *args, **kwargs):
+        if getattr(name, "filename", name) == "f3.txt":
+            raise OSError("disk error")
+        return real_open(self_inner, name, *args, **kwargs)
+
+    with patch.object(DataDownloader, "download", fake_download):
+        with patch.object(zipfile.ZipFile, "open", failing_open), pytest.raises(OSError, match="disk error"):
+            dd.download_unzip_keep_subset("http://fake/test.zip", ["*.txt"], dataset_name="subset")
+        assert not (tmp_path / "downloads" / "subset").exists()
+
+        dd.download_unzip_keep_subset("http://fake/test.zip", ["*.txt"], dataset_name="subset")
+
+    assert sorted(os.listdir(tmp_path / "downloads" / "subset")) == names
+    assert os.listdir(tmp_path / "downloads") == ["subset"]
+
+
+def test_keep_subset_member_names_sanitised_on_windows():
+    """As with ZipFile.extract, a drive-like component can't take a member outside the destination."""
+    from data_downloader import _member_parts
+    assert _member_parts("../tides/./a.nc") == ["tides", "a.nc"]
+    with patch("data_downloader.os.name", "nt"):
+        assert _member_parts("tides/C:/a?.nc") == ["tides", "C_", "a_.nc"]
+
+
+def test_download_checks_sha256(tmp_path, local_server):
+    """The SHA-256 is calculated while downloading and checked against the expected value."""
+    asset = Path(__file__).parent / "assets" / "text.txt"
+    expected = hashlib.sha256(asset.read_bytes()).hexdigest()
+    dd = DataDownloader(download_path=str(tmp_path))
+    url = f"{local_server.base_url}/text.txt"
+
+    info = dd.download(url, str(tmp_path / "good.txt"), sha256=expected)
+    assert info["sha256"] == expected
+
+    with pytest.raises(ValueError):
+        dd.download(url, str(tmp_path / "bad.txt"), sha256="0" * 64)
+    assert not (tmp_path / "bad.txt").exists()
+    assert not (tmp_path / "bad.txt.tmp").exists()
+
+    # An existing file that doesn't match is replaced
+    (tmp_path / "good.txt").write_text("corrupted", encoding="utf-8")
+    dd.download(url, str(tmp_path / "good.txt"), sha256=expected)
+    assert (tmp_path / "good.txt").read_bytes() == asset.read_bytes()